@@ -39,6 +39,31 @@ class AddAxis(torch.nn.Module):
     def forward(self, x):
         return torch.unsqueeze(x, self.ax)
 
+# Wrap a module and count how many samples it has processed
+class CountSamples(torch.nn.Module):
+    def __init__(self, module):
+        super(CountSamples, self).__init__()
+        self.module = module
+        self.n_samples = 0
+
+    def forward(self, x):
+        self.n_samples += x.shape[0]
+        return self.module(x)
+
+# Wrap a module and raise once it has processed more than n samples
+class RaiseAfter(torch.nn.Module):
+    def __init__(self, module, n):
+        super(RaiseAfter, self).__init__()
+        self.module = module
+        self.n = n
+        self.n_samples = 0
+
+    def forward(self, x):
+        self.n_samples += x.shape[0]
+        if self.n_samples > self.n:
+            raise RuntimeError("Simulated failure")
+        return self.module(x)
+
 if __name__ == "__main__":
     print(__name__)
     input_tensor = torch.arange(125).reshape((5, 5, 5)).to(torch.float32)
@@ -5,6 +5,8 @@ from xbatcher.loaders.torch import MapDataset, IterableDataset
 import torch
 from tqdm import tqdm
 
+import hashlib
+from collections.abc import Hashable
 from typing import Literal
 
 def _get_resample_factor(
@@ -102,8 +104,132 @@ def _get_output_array_coordinates(
             # this is a new dim, ignore
             continue
     return output_coords
-    
-    
+
+
+def _hash_patch(patch: torch.Tensor) -> str:
+    '''
+    Compute a content hash for a single input patch. The shape and dtype are
+    included so that patches with identical bytes but different layouts do
+    not collide.
+    '''
+    data = np.ascontiguousarray(patch.detach().cpu().numpy())
+    h = hashlib.blake2b(digest_size=16)
+    h.update(str((data.shape, data.dtype.str)).encode())
+    h.update(data.tobytes())
+    return h.hexdigest()
+
+
+def _hash_model(model: torch.nn.Module) -> str:
+    '''
+    Derive a default cache key from a model's structure and weights. Settings
+    kept as plain attributes rather than parameters or buffers are not seen.
+    '''
+    h = hashlib.blake2b(digest_size=16)
+    h.update(repr(model).encode())
+    for name, tensor in model.state_dict().items():
+        h.update(name.encode())
+        h.update(_hash_patch(tensor).encode())
+    return h.hexdigest()
+
+
+def _get_cache_layout(
+    bgen: xbatcher.BatchGenerator,
+    output_size: dict[str, int],
+    resample_factor: dict[str, float],
+    new_dim: list[str],
+    core_dim: list[str],
+    resample_dim: list[str],
+    cache_key: Hashable | None
+) -> tuple:
+    '''
+    Describe the configuration of a prediction run. Cached per-patch results are
+    only reusable when the output array, the dimension roles, the source dtype,
+    the patch selectors, and the caller-provided ``cache_key`` are identical.
+    '''
+    if isinstance(bgen.ds, xr.Dataset):
+        dtype = tuple((str(k), str(v.dtype)) for k, v in bgen.ds.data_vars.items())
+    else:
+        dtype = str(bgen.ds.dtype)
+    selectors = tuple(
+        tuple(sorted((key, (sl.start, sl.stop)) for key, sl in sel[0].items()))
+        for _, sel in sorted(bgen._batch_selectors.selectors.items())
+    )
+    return (
+        tuple(output_size.items()),
+        tuple(sorted(resample_factor.items())),
+        tuple(new_dim),
+        tuple(core_dim),
+        tuple(resample_dim),
+        dtype,
+        selectors,
+        cache_key
+    )
+
+
+def _get_output_indexer(
+    old_indexer: dict[str, slice],
+    resample_dim: list[str],
+    resample_factor: dict[str, float]
+) -> dict[str, slice]:
+    '''
+    Map a patch selector on the source array to the region of the output
+    array that the patch's prediction covers.
+    '''
+    # Only index into axes that are resampled, rescaling the bounds
+    # Perhaps use xbatcher _gen_slices here?
+    new_indexer = {}
+    for key in old_indexer:
+        if key in resample_dim:
+            new_indexer[key] = slice(
+                int(old_indexer[key].start * resample_factor[key]),
+                int(old_indexer[key].stop * resample_factor[key])
+            )
+    return new_indexer
+
+
+def _reblend_dirty_regions(
+    cache: dict,
+    bgen: xbatcher.BatchGenerator,
+    resample_dim: list[str],
+    resample_factor: dict[str, float]
+):
+    '''
+    Recompute ``cache["sum"]`` and ``cache["count"]`` on the output regions
+    covered by the patches in ``cache["dirty"]``. Every patch overlapping those
+    regions is re-added from ``cache["outputs"]`` in patch order, so affected
+    pixels match a full run exactly and the rest of the output is untouched.
+    Zeroing and re-adding is idempotent, so an interrupted call is simply
+    redone on the next run.
+    '''
+    output_sum = cache["sum"].data
+    output_count = cache["count"].data
+    dims = cache["sum"].dims
+
+    def to_index(global_index):
+        indexer = _get_output_indexer(
+            bgen._batch_selectors.selectors[global_index][0],
+            resample_dim,
+            resample_factor
+        )
+        return tuple(indexer.get(dim, slice(None)) for dim in dims)
+
+    mask = np.zeros(output_sum.shape, dtype=bool)
+    for global_index in cache["dirty"]:
+        mask[to_index(global_index)] = True
+    output_sum[mask] = 0
+    output_count[mask] = 0
+
+    for global_index in sorted(cache["outputs"]):
+        index = to_index(global_index)
+        region_mask = mask[index]
+        if not region_mask.any():
+            continue
+        output_sum[index] += np.where(region_mask, cache["outputs"][global_index], 0)
+        output_count[index] += region_mask
+
+    cache["dirty"] = set()
+
+
 def predict_on_array(
     dataset: MapDataset | IterableDataset,
     model: torch.nn.Module,
@@ -112,7 +238,9 @@ def predict_on_array(
     core_dim: list[str],
     resample_dim: list[str],
     resample_mode: Literal["centers", "edges"]="edges",
-    batch_size: int=16
+    batch_size: int=16,
+    cache: dict | None=None,
+    cache_key: Hashable | None=None
 ) -> xr.DataArray:
     '''
     Generate predictions from a PyTorch model and reassemble predictions
@@ -153,6 +281,23 @@ def predict_on_array(
     ``resample_mode`` (``"edges"|"centers"``): Whether to treat coordinates on the input
     array as pixel edges or centers.
 
+    ``cache`` (``dict | None``): Optional dictionary used for incremental re-inference.
+    Pass an empty dictionary on the first run and the same dictionary on later runs.
+    It is filled with a content hash and the model output for every patch, along
+    with the running (sum, count) arrays. On later runs only patches whose hash has
+    changed are passed through ``model``. The output regions they cover are then
+    re-blended from the stored outputs of every overlapping patch, so the result
+    matches a full run exactly. Recomputed patches are tracked in the cache until
+    re-blending finishes, so an interrupted run is repaired by the next one. The
+    cache is reset automatically if the output size, the dimension lists, the
+    source dtype, the patch layout, or ``cache_key`` changes.
+
+    ``cache_key`` (``Hashable | None``): An identifier for the model, such as a
+    checkpoint name. Changing it invalidates ``cache``. If ``None``, a key is
+    derived from the model's ``repr`` and ``state_dict``, which does not see
+    settings stored as plain attributes; callers must pass a new ``cache_key``
+    whenever the model changes in a way the default key cannot detect.
+
     Notes
     -----
     The output array size is determined by the axes in ``output_tensor_dim`` according
@@ -204,6 +349,32 @@ def predict_on_array(
         dims=tuple(output_size.keys()),
     )
     output_n = xr.full_like(output_da, 0)
+
+    # Reuse the accumulated sums from a previous run when the layout matches
+    if cache is not None:
+        if cache_key is None:
+            cache_key = _hash_model(model)
+        layout = _get_cache_layout(
+            bgen,
+            output_size,
+            resample_factor,
+            new_dim,
+            core_dim,
+            resample_dim,
+            cache_key
+        )
+        if cache.get("layout") != layout:
+            cache.clear()
+            cache.update(
+                layout=layout,
+                hashes={},
+                outputs={},
+                dirty=set(),
+                sum=output_da,
+                count=output_n
+            )
+        output_da = cache["sum"]
+        output_n = cache["count"]
     
     # Prepare data laoder
     loader = torch.utils.data.DataLoader(dataset, batch_size=batch_size)
@@ -211,26 +382,53 @@ def predict_on_array(
     # Iterate over each batch
     for i, batch in tqdm(enumerate(loader), total=len(loader)):
         input_tensor = batch[0] if isinstance(batch, (list, tuple)) else batch
+
+        # Only run the model on samples whose contents changed
+        if cache is None:
+            changed = list(range(input_tensor.shape[0]))
+        else:
+            hashes = {}
+            for ib in range(input_tensor.shape[0]):
+                global_index = (i * batch_size) + ib
+                patch_hash = _hash_patch(input_tensor[ib])
+                if cache["hashes"].get(global_index) != patch_hash:
+                    hashes[ib] = patch_hash
+            changed = list(hashes.keys())
+
+        if not changed:
+            continue
+
+        if len(changed) < input_tensor.shape[0]:
+            input_tensor = input_tensor[changed]
         out_batch = model(input_tensor).detach().numpy()
 
-        # Iterate over each sample in the batch
-        for ib in range(out_batch.shape[0]):
-            # Get the slice object associated with this sample
+        # Iterate over each recomputed sample in the batch
+        for ob, ib in enumerate(changed):
             global_index = (i * batch_size) + ib
-            old_indexer = bgen._batch_selectors.selectors[global_index][0]
-            # Only index into axes that are resampled, rescaling the bounds
-            # Perhaps use xbatcher _gen_slices here?
-            new_indexer = {}
-            for key in old_indexer:
-                if key in resample_dim:
-                    new_indexer[key] = slice(
-                        int(old_indexer[key].start * resample_factor[key]),
-                        int(old_indexer[key].stop * resample_factor[key])
-                    )
-
-            output_da.loc[new_indexer] += out_batch[ib, ...]
+
+            if cache is not None:
+                # Mark the patch before replacing its output so that a run
+                # aborted before re-blending is finished by the next run
+                cache["dirty"].add(global_index)
+                cache["outputs"][global_index] = out_batch[ob, ...].copy()
+                cache["hashes"][global_index] = hashes[ib]
+                continue
+
+            # Get the slice object associated with this sample
+            new_indexer = _get_output_indexer(
+                bgen._batch_selectors.selectors[global_index][0],
+                resample_dim,
+                resample_factor
+            )
+            output_da.loc[new_indexer] += out_batch[ob, ...]
             output_n.loc[new_indexer] += 1
 
+    # Re-blend the regions of recomputed patches from the stored outputs
+    # instead of subtracting stale ones, which would keep NaN/inf around
+    # and accumulate rounding error.
+    if cache is not None and cache["dirty"]:
+        _reblend_dirty_regions(cache, bgen, resample_dim, resample_factor)
+
     # Calculate mean
     output_da = output_da / output_n
 
@@ -7,7 +7,7 @@ from xbatcher.loaders.torch import MapDataset
 
 from functions import _get_output_array_size, _resample_coordinate
 from functions import predict_on_array, _get_resample_factor
-from dummy_models import Identity, MeanAlongDim, SubsetAlongAxis, ExpandAlongAxis, AddAxis
+from dummy_models import Identity, MeanAlongDim, SubsetAlongAxis, ExpandAlongAxis, AddAxis, CountSamples, RaiseAfter
 
 @pytest.fixture
 def map_dataset_fixture() -> MapDataset:
@@ -109,3 +109,156 @@ def test_predict_on_array_all_models(
 
     # --- Assert correctness ---
     np.testing.assert_allclose(result_da.values, expected_avg_data, equal_nan=True)
+
+
+def _n_covering(bgen, x, y):
+    return sum(
+        1 for sel in bgen._batch_selectors.selectors.values()
+        if sel[0]['x'].start <= x < sel[0]['x'].stop and sel[0]['y'].start <= y < sel[0]['y'].stop
+    )
+
+
+@pytest.mark.parametrize("batch_size", [1, 2, 3])
+def test_predict_on_array_incremental(map_dataset_fixture, batch_size):
+    """
+    Tests that a cached re-run only recomputes changed patches and re-blends
+    overlaps with unchanged patches to match a full recomputation.
+    """
+    dataset = map_dataset_fixture
+    bgen = dataset.X_generator
+    kwargs = dict(
+        output_tensor_dim={'x': 20, 'y': 5},
+        new_dim=[], core_dim=[], resample_dim=['x', 'y'], batch_size=batch_size
+    )
+    cache = {}
+
+    # First run fills the cache and processes every patch
+    model = CountSamples(ExpandAlongAxis(ax=1, n_repeats=2))
+    first = predict_on_array(dataset=dataset, model=model, cache=cache, **kwargs)
+    full = predict_on_array(dataset=dataset, model=ExpandAlongAxis(ax=1, n_repeats=2), **kwargs)
+    assert model.n_samples == len(dataset)
+    np.testing.assert_allclose(first.values, full.values)
+
+    # Unchanged inputs do not touch the model
+    model = CountSamples(ExpandAlongAxis(ax=1, n_repeats=2))
+    predict_on_array(dataset=dataset, model=model, cache=cache, **kwargs)
+    assert model.n_samples == 0
+
+    # (9, 0) lies in the x overlap but only in some of the patches
+    n_affected = _n_covering(bgen, 9, 0)
+    assert 1 < n_affected < len(dataset)
+    bgen.ds.data[9, 0] = -100.0
+    model = CountSamples(ExpandAlongAxis(ax=1, n_repeats=2))
+    updated = predict_on_array(dataset=dataset, model=model, cache=cache, **kwargs)
+    full = predict_on_array(dataset=dataset, model=ExpandAlongAxis(ax=1, n_repeats=2), **kwargs)
+    assert model.n_samples == n_affected
+    np.testing.assert_allclose(updated.values, full.values)
+
+
+@pytest.mark.parametrize("batch_size", [1, 2])
+def test_predict_on_array_incremental_nan(map_dataset_fixture, batch_size):
+    """
+    Tests that a NaN pixel in an overlap region is cleanly replaced once
+    the input is filled in, and that an unchanged re-run is bit-identical.
+    """
+    dataset = map_dataset_fixture
+    bgen = dataset.X_generator
+    kwargs = dict(
+        output_tensor_dim={'x': 10, 'y': 5},
+        new_dim=[], core_dim=[], resample_dim=['x', 'y'], batch_size=batch_size
+    )
+    cache = {}
+
+    bgen.ds.data[9, 0] = np.nan
+    first = predict_on_array(dataset=dataset, model=CountSamples(Identity()), cache=cache, **kwargs)
+    assert np.isnan(first.values[9, 0])
+
+    # Fill in the missing pixel
+    bgen.ds.data[9, 0] = 1000.0
+    model = CountSamples(Identity())
+    updated = predict_on_array(dataset=dataset, model=model, cache=cache, **kwargs)
+    full = predict_on_array(dataset=dataset, model=Identity(), **kwargs)
+    assert model.n_samples == _n_covering(bgen, 9, 0)
+    assert not np.isnan(updated.values).any()
+    np.testing.assert_allclose(updated.values, full.values, equal_nan=True)
+
+    # A second run without changes leaves the result untouched
+    model = CountSamples(Identity())
+    again = predict_on_array(dataset=dataset, model=model, cache=cache, **kwargs)
+    assert model.n_samples == 0
+    np.testing.assert_array_equal(again.values, updated.values)
+
+
+def test_predict_on_array_incremental_abort(map_dataset_fixture):
+    """
+    Tests that a refresh aborted partway through is completed by the next
+    run, even when that run finds no changed patches.
+    """
+    dataset = map_dataset_fixture
+    bgen = dataset.X_generator
+    kwargs = dict(
+        output_tensor_dim={'x': 10, 'y': 5},
+        new_dim=[], core_dim=[], resample_dim=['x', 'y'], batch_size=1
+    )
+    cache = {}
+    predict_on_array(dataset=dataset, model=Identity(), cache=cache, cache_key="v1", **kwargs)
+
+    # Change the first and last patch, and fail while processing the last one
+    assert _n_covering(bgen, 0, 0) == 1 and _n_covering(bgen, 17, 7) == 1
+    original = bgen.ds.data[17, 7]
+    bgen.ds.data[0, 0] = -100.0
+    bgen.ds.data[17, 7] = -100.0
+    with pytest.raises(RuntimeError):
+        predict_on_array(
+            dataset=dataset, model=RaiseAfter(Identity(), n=1), cache=cache, cache_key="v1", **kwargs
+        )
+
+    # Undo the second change so every patch hash matches the cache
+    bgen.ds.data[17, 7] = original
+    model = CountSamples(Identity())
+    result = predict_on_array(dataset=dataset, model=model, cache=cache, cache_key="v1", **kwargs)
+    full = predict_on_array(dataset=dataset, model=Identity(), **kwargs)
+    assert model.n_samples == 0
+    np.testing.assert_allclose(result.values, full.values)
+
+
+def test_predict_on_array_incremental_cache_key(map_dataset_fixture):
+    """
+    Tests that changing the cache key, the model weights, or the dimension
+    roles resets the cache.
+    """
+    dataset = map_dataset_fixture
+    kwargs = dict(
+        output_tensor_dim={'x': 10, 'y': 5},
+        new_dim=[], core_dim=[], resample_dim=['x', 'y'], batch_size=2
+    )
+    cache = {}
+    predict_on_array(dataset=dataset, model=Identity(), cache=cache, cache_key="v1", **kwargs)
+
+    model = CountSamples(Identity())
+    predict_on_array(dataset=dataset, model=model, cache=cache, cache_key="v1", **kwargs)
+    assert model.n_samples == 0
+
+    model = CountSamples(Identity())
+    predict_on_array(dataset=dataset, model=model, cache=cache, cache_key="v2", **kwargs)
+    assert model.n_samples == len(dataset)
+
+    model = CountSamples(AddAxis(ax=1))
+    predict_on_array(
+        dataset=dataset, model=model, cache=cache, cache_key="v2",
+        output_tensor_dim={'channel': 1, 'x': 10, 'y': 5},
+        new_dim=['channel'], core_dim=[], resample_dim=['x', 'y'], batch_size=2
+    )
+    assert model.n_samples == len(dataset)
+
+    # Without a cache key, updated weights are detected from the state dict
+    model = CountSamples(torch.nn.Conv1d(10, 10, kernel_size=1))
+    cache = {}
+    predict_on_array(dataset=dataset, model=model, cache=cache, **kwargs)
+    model.n_samples = 0
+    predict_on_array(dataset=dataset, model=model, cache=cache, **kwargs)
+    assert model.n_samples == 0
+    with torch.no_grad():
+        model.module.weight.add_(1.0)
+    predict_on_array(dataset=dataset, model=model, cache=cache, **kwargs)
+    assert model.n_samples == len(dataset)